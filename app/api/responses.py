@@ -0,0 +1,25 @@
+"""Custom response classes"""
+from typing import Any
+import orjson
+from fastapi import Response, status
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response encoded with orjson - serializes datetimes natively and is much faster for large lists
+
+    Returning this directly from a route also skips FastAPI's response_model re-validation,
+    so only use it with payloads that are already shaped like the declared response_model.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+def not_modified_response(etag: str, cache_control: str) -> Response:
+    """304 Not Modified for a conditional request whose ETag still matches"""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control}
+    )
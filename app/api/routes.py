@@ -1,5 +1,7 @@
 """API route handlers"""
-from fastapi import APIRouter, status, BackgroundTasks, Depends, HTTPException
+import uuid
+from fastapi import APIRouter, status, BackgroundTasks, Depends, HTTPException, Query, Header, Response
+from fastapi.responses import StreamingResponse
 from datetime import datetime
 from sqlalchemy.orm import Session
 
@@ -10,21 +12,41 @@ from app.schemas.models import (
     AffirmationHistoryItem,
     ChampionPhraseResponse,
     ExperimentCreate,
-    ExperimentResponse
+    ExperimentResponse,
+    PhraseLeaderboardItem,
+    PowerAnalysisResponse,
+    PowerReplayResponse
 )
 from app.services.ferret_service import (
     get_words_of_affirmation,
     update_affirmation_result,
     create_affirmation_record,
-    process_affirmation_and_callback
+    process_affirmation_and_callback,
+    list_affirmation_history_payloads
 )
 from app.services.experiment_service import (
     create_experiment,
     execute_experiment,
-    build_experiment_response
+    build_experiment_response,
+    list_experiment_payloads
 )
-from app.db.session import get_db
-from app.db.models import AffirmationResult, ChampionPhrase, Experiment, ExperimentStatus
+from app.services.phrase_service import get_phrase_leaderboard
+from app.services.traffic_service import find_overlapping_experiment
+from app.services.power_service import estimate_target_runs, get_champion_joy_rate, replay_experiment
+from app.services.event_service import stream_experiment_events, format_event, FINAL_RETRY_MS
+from app.services.version_service import (
+    champion_etag,
+    experiment_etag,
+    get_champion_etag,
+    get_experiment_etag,
+    get_experiments_list_etag,
+    etag_matches,
+    REVALIDATE_CACHE_CONTROL,
+    IMMUTABLE_CACHE_CONTROL
+)
+from app.api.responses import ORJSONResponse, not_modified_response
+from app.db.session import get_db, SessionLocal
+from app.db.models import ChampionPhrase, Experiment, ExperimentStatus
 
 router = APIRouter()
 
@@ -59,14 +81,13 @@ async def share_affirmation(
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ) -> AffirmationResponse:
-    """Share the champion affirmation with our fickle ferrets - returns immediately and processes asynchronously"""
-    words_of_affirmation = get_words_of_affirmation(db)
-
-    # Generate unique affirmation ID
+    """Share the champion affirmation (or an experiment variant) with our fickle ferrets - returns immediately and processes asynchronously"""
+    # Generate unique affirmation ID - it also decides which experiment and variant (if any) is used
     affirmation_id = str(uuid.uuid4())
-    
+    words_of_affirmation, experiment_id = get_words_of_affirmation(db, affirmation_id)
+
     # Create database record for this affirmation
-    create_affirmation_record(affirmation_id, words_of_affirmation, db)
+    create_affirmation_record(affirmation_id, words_of_affirmation, db, experiment_id=experiment_id)
     
     # Construct webhook URL (assuming localhost for development)
     webhook_url = "http://localhost:8000/webhook/ferret-reaction"
@@ -80,7 +101,10 @@ async def share_affirmation(
     )
     
     print(f"[AFFIRMATION] 🦦 New affirmation received! ID: {affirmation_id}")
-    print(f"[AFFIRMATION] 📝 Using champion phrase: '{words_of_affirmation}'")
+    if experiment_id:
+        print(f"[AFFIRMATION] 🧪 Using experiment {experiment_id} phrase: '{words_of_affirmation}'")
+    else:
+        print(f"[AFFIRMATION] 📝 Using champion phrase: '{words_of_affirmation}'")
 
     # Return immediately with affirmation ID
     return AffirmationResponse(
@@ -90,36 +114,55 @@ async def share_affirmation(
 
 
 @router.get("/champion", response_model=ChampionPhraseResponse)
-async def get_champion_phrase(db: Session = Depends(get_db)) -> ChampionPhraseResponse:
-    """Get the current champion phrase"""
+async def get_champion_phrase(
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+    db: Session = Depends(get_db)
+) -> ChampionPhraseResponse | Response:
+    """Get the current champion phrase (supports If-None-Match)"""
+    # Answered from the in-process version cache, so a matching poll never queries the database
+    etag = get_champion_etag(db)
+    if etag and etag_matches(if_none_match, etag):
+        return not_modified_response(etag, REVALIDATE_CACHE_CONTROL)
+
     champion = db.query(ChampionPhrase).filter(ChampionPhrase.id == 1).first()
+    # Derive the ETag from the row itself, which may be newer than the version cache
+    response.headers["ETag"] = champion_etag(champion.updated_at)
+    response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
     return ChampionPhraseResponse(
         phrase=champion.phrase,
         updated_at=champion.updated_at
     )
 
 
-@router.get("/affirmations/history", response_model=list[AffirmationHistoryItem])
+@router.get("/affirmations/history", response_model=list[AffirmationHistoryItem], response_class=ORJSONResponse)
 async def get_affirmation_history(
     limit: int = 50,
     db: Session = Depends(get_db)
-) -> list[AffirmationHistoryItem]:
+) -> ORJSONResponse:
     """Get history of affirmations and ferret reactions"""
-    # Query database for recent affirmations
-    results = db.query(AffirmationResult).order_by(
-        AffirmationResult.created_at.desc()
-    ).limit(limit).all()
+    # Column-only query serialized straight to JSON (response_model is kept for the docs)
+    return ORJSONResponse(list_affirmation_history_payloads(db, limit))
+
 
-    # Convert to response models
+@router.get("/phrases/leaderboard", response_model=list[PhraseLeaderboardItem])
+async def get_phrases_leaderboard(
+    limit: int = Query(default=10, ge=1, le=100),
+    db: Session = Depends(get_db)
+) -> list[PhraseLeaderboardItem]:
+    """Get the top phrases across all experiments, ranked by the lower bound of their joy rate"""
     return [
-        AffirmationHistoryItem(
-            affirmation_id=result.affirmation_id,
-            words_of_affirmation=result.words_of_affirmation,
-            joy_sparked=result.joy_sparked,
-            created_at=result.created_at,
-            callback_received_at=result.callback_received_at
+        PhraseLeaderboardItem(
+            phrase=stats.phrase,
+            sends=stats.sends,
+            reactions=stats.reactions,
+            joys=stats.joys,
+            joy_rate=stats.joys / stats.reactions if stats.reactions > 0 else None,
+            joy_rate_lower=stats.joy_rate_lower,
+            joy_rate_upper=stats.joy_rate_upper,
+            last_seen_at=stats.last_seen_at
         )
-        for result in results
+        for stats in get_phrase_leaderboard(db, limit)
     ]
 
 
@@ -129,22 +172,24 @@ async def create_new_experiment(
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ) -> ExperimentResponse:
-    """Create a new A/B test experiment - auto-activates and runs if no other experiment is active
+    """Create a new A/B test experiment - auto-activates and runs if no active experiment overlaps its traffic slice
     Variant A is automatically set to the current champion phrase"""
-    # Check if there's already an active experiment
-    active_experiment = db.query(Experiment).filter(Experiment.status == ExperimentStatus.ACTIVE.value).first()
+    # Active experiments must own disjoint traffic slices
+    overlapping_experiment = find_overlapping_experiment(db, experiment.traffic_start, experiment.traffic_end)
 
-    if active_experiment:
+    if overlapping_experiment:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
-            detail=f"An experiment is already active: '{active_experiment.name}' (ID: {active_experiment.id}). Please wait for it to complete before creating a new one."
+            detail=f"Traffic buckets [{experiment.traffic_start}, {experiment.traffic_end}) overlap active experiment '{overlapping_experiment.name}' (ID: {overlapping_experiment.id}) on [{overlapping_experiment.traffic_start}, {overlapping_experiment.traffic_end}). Pick a disjoint slice or wait for it to complete."
         )
 
     new_experiment = create_experiment(
         db=db,
         name=experiment.name,
         variant_b_phrase=experiment.variant_b_phrase,
-        target_runs=experiment.target_runs
+        target_runs=experiment.target_runs,
+        traffic_start=experiment.traffic_start,
+        traffic_end=experiment.traffic_end
     )
     # Automatically execute the experiment in the background
     background_tasks.add_task(execute_experiment, new_experiment.id, db)
@@ -153,34 +198,118 @@ async def create_new_experiment(
     return build_experiment_response(new_experiment)
 
 
-@router.get("/experiments", response_model=list[ExperimentResponse])
+@router.get("/experiments", response_model=list[ExperimentResponse], response_class=ORJSONResponse)
 async def list_experiments(
     status_filter: str | None = None,
+    if_none_match: str | None = Header(default=None),
     db: Session = Depends(get_db)
-) -> list[ExperimentResponse]:
-    """List all experiments, optionally filtered by status (active, completed)"""
-    query = db.query(Experiment)
-
-    if status_filter:
-        query = query.filter(Experiment.status == status_filter)
-
-    experiments = query.order_by(Experiment.created_at.desc()).all()
-
-    return [build_experiment_response(exp) for exp in experiments]
+) -> Response:
+    """List all experiments, optionally filtered by status (active, completed) (supports If-None-Match)"""
+    etag = get_experiments_list_etag(db, status_filter)
+    if etag_matches(if_none_match, etag):
+        return not_modified_response(etag, REVALIDATE_CACHE_CONTROL)
+
+    # Column-only query serialized straight to JSON (response_model is kept for the docs)
+    return ORJSONResponse(
+        list_experiment_payloads(db, status_filter),
+        headers={"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL}
+    )
 
 
 @router.get("/experiments/{experiment_id}", response_model=ExperimentResponse)
 async def get_experiment(
     experiment_id: str,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
     db: Session = Depends(get_db)
-) -> ExperimentResponse:
-    """Get details for a specific experiment, including results if completed"""
+) -> ExperimentResponse | Response:
+    """Get details for a specific experiment, including results if completed (supports If-None-Match)"""
+    cached = get_experiment_etag(db, experiment_id)
+    if cached:
+        etag, completed = cached
+        cache_control = IMMUTABLE_CACHE_CONTROL if completed else REVALIDATE_CACHE_CONTROL
+        if etag_matches(if_none_match, etag):
+            return not_modified_response(etag, cache_control)
+
     experiment = db.query(Experiment).filter(Experiment.id == experiment_id).first()
 
     if not experiment:
         raise HTTPException(status_code=404, detail=f"Experiment {experiment_id} not found")
 
+    # Derive headers from the row itself, which may be newer than the version cache
+    response.headers["ETag"] = experiment_etag(experiment.id, experiment.version)
+    response.headers["Cache-Control"] = (
+        IMMUTABLE_CACHE_CONTROL if experiment.status == ExperimentStatus.COMPLETED.value else REVALIDATE_CACHE_CONTROL
+    )
+
     return build_experiment_response(experiment)
 
 
+@router.get("/experiments/{experiment_id}/events", response_class=StreamingResponse)
+async def get_experiment_events(experiment_id: str) -> StreamingResponse:
+    """Stream live experiment progress as Server-Sent Events
+
+    Events: `progress` (per-variant reaction counts and win rates, sent on connect and on every reaction),
+    `completed` (final results), `champion` (champion phrase updated). The stream ends when the experiment completes;
+    `completed` sets a one-day `retry`, but clients should still call `EventSource.close()` when they receive it.
+    """
+    # Not Depends(get_db): that session would hold a pooled connection for as long as the stream stays open
+    with SessionLocal() as db:
+        experiment = db.query(Experiment).filter(Experiment.id == experiment_id).first()
+
+        if not experiment:
+            raise HTTPException(status_code=404, detail=f"Experiment {experiment_id} not found")
+
+        completed = None
+        if experiment.status == ExperimentStatus.COMPLETED.value:
+            completed = format_event("completed", build_experiment_response(experiment).model_dump_json(), FINAL_RETRY_MS)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+    if completed:
+        # Nothing left to watch - send the final results and end the stream
+        return StreamingResponse(iter([completed]), media_type="text/event-stream", headers=headers)
+
+    return StreamingResponse(stream_experiment_events(experiment_id), media_type="text/event-stream", headers=headers)
+
+
+@router.get("/experiments/{experiment_id}/power-replay", response_model=PowerReplayResponse)
+def get_experiment_power_replay(
+    experiment_id: str,
+    alpha: float = Query(default=0.05, gt=0, lt=1),
+    db: Session = Depends(get_db)
+) -> PowerReplayResponse:
+    """Check the power simulator against a past experiment by replaying subsets of its stored reactions"""
+    # Plain def so the NumPy work runs in the threadpool instead of blocking the event loop
+    replay = replay_experiment(db, experiment_id, alpha=alpha)
+
+    if not replay:
+        raise HTTPException(status_code=404, detail=f"Experiment {experiment_id} not found")
+
+    return PowerReplayResponse.model_validate(replay)
+
+
+@router.get("/power-analysis", response_model=PowerAnalysisResponse)
+def get_power_analysis(
+    effect_size: float = Query(..., gt=0, lt=1, description="Absolute joy rate improvement to detect, e.g. 0.05"),
+    power: float = Query(default=0.8, gt=0, lt=1),
+    alpha: float = Query(default=0.05, gt=0, lt=1),
+    baseline_rate: float | None = Query(default=None, gt=0, lt=1, description="Defaults to the champion's lifetime joy rate"),
+    db: Session = Depends(get_db)
+) -> PowerAnalysisResponse:
+    """Estimate the target_runs an experiment needs to detect a given improvement over the champion"""
+    # Plain def so the NumPy work runs in the threadpool instead of blocking the event loop
+    if baseline_rate is None:
+        baseline_rate = get_champion_joy_rate(db)
+    if baseline_rate is None:
+        raise HTTPException(
+            status_code=422,
+            detail="The champion phrase has no recorded reactions yet - pass baseline_rate explicitly."
+        )
+
+    try:
+        estimate = estimate_target_runs(baseline_rate, effect_size, alpha=alpha, power=power)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
+    return PowerAnalysisResponse.model_validate(estimate)
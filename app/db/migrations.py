@@ -0,0 +1,35 @@
+"""Additive column migrations for databases created by an older version of the app
+
+create_all only creates missing tables, so columns added to an existing table are listed here and
+added with ALTER TABLE on startup. Every column needs a DEFAULT so existing rows get a valid value.
+"""
+from sqlalchemy import Engine, inspect, text
+
+from .models import TRAFFIC_BUCKETS
+
+# table -> [(column, SQL column definition)]
+ADDED_COLUMNS: dict[str, list[tuple[str, str]]] = {
+    "experiments": [
+        ("traffic_start", "INTEGER NOT NULL DEFAULT 0"),
+        ("traffic_end", f"INTEGER NOT NULL DEFAULT {TRAFFIC_BUCKETS}"),
+        ("version", "INTEGER NOT NULL DEFAULT 1"),
+    ],
+}
+
+
+def add_missing_columns(engine: Engine) -> list[str]:
+    """Add any ADDED_COLUMNS the tables don't have yet - safe to run on every startup
+
+    Returns:
+        list[str]: The columns added, as "table.column"
+    """
+    added = []
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {column["name"] for column in inspector.get_columns(table)}
+            for name, definition in columns:
+                if name not in existing:
+                    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {definition}"))
+                    added.append(f"{table}.{name}")
+    return added
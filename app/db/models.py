@@ -1,9 +1,12 @@
 """SQLAlchemy database models"""
 from enum import Enum
-from sqlalchemy import Column, String, Boolean, DateTime, Integer
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, Float
 from datetime import datetime
 from .base import Base
 
+# Affirmation traffic is hashed into this many buckets; each active experiment owns a disjoint range of them
+TRAFFIC_BUCKETS: int = 1000
+
 
 class ExperimentStatus(str, Enum):
     """Experiment status values"""
@@ -39,8 +42,12 @@ class Experiment(Base):
     variant_b_phrase = Column(String, nullable=False)
     status = Column(String, nullable=False)  # "active", "completed"
     target_runs = Column(Integer, nullable=False)
+    # Traffic slice [traffic_start, traffic_end) of the hash buckets this experiment receives
+    traffic_start = Column(Integer, nullable=False, default=0)
+    traffic_end = Column(Integer, nullable=False, default=TRAFFIC_BUCKETS)
     created_at = Column(DateTime, default=datetime.now, nullable=False)
     completed_at = Column(DateTime, nullable=True)
+    version = Column(Integer, nullable=False, default=1)  # Bumped on every change, used for ETags
 
     # Results (calculated and stored at completion)
     winning_variant = Column(String, nullable=True)  # "A" or "B"
@@ -69,3 +76,20 @@ class AffirmationResult(Base):
     def __repr__(self) -> str:
         return f"<AffirmationResult(id={self.affirmation_id}, joy={self.joy_sparked})>"
 
+
+
+class PhraseStats(Base):
+    """Lifetime joy statistics per phrase, maintained incrementally as affirmations are sent and reacted to"""
+    __tablename__ = "phrase_stats"
+
+    phrase = Column(String, primary_key=True)
+    sends = Column(Integer, nullable=False, default=0)
+    reactions = Column(Integer, nullable=False, default=0)  # Callbacks received
+    joys = Column(Integer, nullable=False, default=0)
+    # Wilson score interval on joys/reactions (stored so the leaderboard can be served from an index)
+    joy_rate_lower = Column(Float, nullable=False, default=0.0, index=True)
+    joy_rate_upper = Column(Float, nullable=False, default=0.0)
+    last_seen_at = Column(DateTime, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<PhraseStats(phrase={self.phrase}, joys={self.joys}/{self.reactions})>"
@@ -3,7 +3,10 @@ from contextlib import asynccontextmanager
 from .api.routes import router
 from .db.base import Base
 from .db.session import engine, SessionLocal
-from .db.models import ChampionPhrase
+from .db.migrations import add_missing_columns
+from .db.models import ChampionPhrase, PhraseStats, AffirmationResult
+from .services.phrase_service import rebuild_phrase_stats
+from .services.spark_client import spark_client
 
 
 @asynccontextmanager
@@ -12,6 +15,10 @@ async def lifespan(app: FastAPI):
     # Create all tables
     print("[DATABASE] 🗄️  Initializing SQLite database...")
     Base.metadata.create_all(bind=engine)
+
+    # Add columns introduced since the database was created (create_all never alters existing tables)
+    for column in add_missing_columns(engine):
+        print(f"[DATABASE] 🧱 Added column {column}")
     print("[DATABASE] ✅ Database initialized successfully!")
     
     # Seed champion phrase if not exists
@@ -30,9 +37,23 @@ async def lifespan(app: FastAPI):
         db.rollback()
     finally:
         db.close()
+
+    # Backfill phrase stats for databases created before the stats table existed
+    db = SessionLocal()
+    try:
+        if not db.query(PhraseStats).first() and db.query(AffirmationResult).first():
+            phrase_count = rebuild_phrase_stats(db)
+            print(f"[DATABASE] 📈 Backfilled lifetime stats for {phrase_count} phrases")
+    except Exception as e:
+        print(f"[DATABASE] ❌ Error backfilling phrase stats: {e}")
+        db.rollback()
+    finally:
+        db.close()
     
     yield
-    # Cleanup (if needed)
+
+    # Close the shared Spark API connection pool
+    await spark_client.aclose()
 
 
 app = FastAPI(
@@ -1,7 +1,9 @@
 """Pydantic models for request/response validation"""
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
-from typing import Literal
+from typing import Literal, Self
+
+from app.db.models import TRAFFIC_BUCKETS
 
 
 class Message(BaseModel):
@@ -54,6 +56,14 @@ class ExperimentCreate(BaseModel):
     name: str = Field(..., description="Name/description of the experiment")
     variant_b_phrase: str = Field(..., description="New phrase to test against current champion")
     target_runs: int = Field(default=100, ge=1, description="Number of affirmations to run for this experiment")
+    traffic_start: int = Field(default=0, ge=0, lt=TRAFFIC_BUCKETS, description=f"First traffic bucket (of {TRAFFIC_BUCKETS}) routed to this experiment")
+    traffic_end: int = Field(default=TRAFFIC_BUCKETS, gt=0, le=TRAFFIC_BUCKETS, description="Traffic bucket after the last one routed to this experiment")
+
+    @model_validator(mode="after")
+    def check_traffic_slice(self) -> Self:
+        if self.traffic_start >= self.traffic_end:
+            raise ValueError("traffic_start must be less than traffic_end")
+        return self
 
 
 class ExperimentResponse(BaseModel):
@@ -64,6 +74,8 @@ class ExperimentResponse(BaseModel):
     variant_b_phrase: str
     status: Literal["active", "completed"]
     target_runs: int
+    traffic_start: int
+    traffic_end: int
     created_at: datetime
     completed_at: datetime | None
     winning_variant: Literal["A", "B"] | None
@@ -74,3 +86,76 @@ class ExperimentResponse(BaseModel):
     variant_a_win_rate: float | None
     variant_b_win_rate: float | None
 
+
+
+class PhraseLeaderboardItem(BaseModel):
+    """Lifetime joy statistics for a phrase across all experiments"""
+    phrase: str
+    sends: int = Field(..., description="Number of times the phrase was sent to the ferrets")
+    reactions: int = Field(..., description="Number of ferret reactions received")
+    joys: int = Field(..., description="Number of reactions that sparked joy")
+    joy_rate: float | None = Field(None, description="joys / reactions")
+    joy_rate_lower: float = Field(..., description="Lower bound of the 95% Wilson confidence interval")
+    joy_rate_upper: float = Field(..., description="Upper bound of the 95% Wilson confidence interval")
+    last_seen_at: datetime | None = Field(None, description="When the phrase was last sent")
+
+
+class PowerAnalysisResponse(BaseModel):
+    """Recommended target_runs for detecting a given improvement over the champion"""
+    baseline_rate: float = Field(..., description="Champion joy rate the estimate assumes")
+    challenger_rate: float = Field(..., description="Challenger joy rate to detect (baseline + effect size)")
+    alpha: float = Field(..., description="Significance level of the two-sided test")
+    power: float = Field(..., description="Requested probability of detecting the challenger")
+    analytic_target_runs: int = Field(..., description="Normal approximation estimate")
+    target_runs: int = Field(..., description="Smallest target_runs reaching the requested power in simulation")
+    simulated_power: float = Field(..., description="Simulated power at target_runs")
+    simulations: int = Field(..., description="Number of simulated experiments behind simulated_power")
+
+    class Config:
+        from_attributes = True
+
+
+class ReplayCheckpointResponse(BaseModel):
+    """Detection rate at a given number of runs"""
+    runs: int
+    predicted_power: float = Field(..., description="Power predicted by simulation at the observed joy rates")
+    replayed_power: float = Field(..., description="Detection rate when subsampling the stored reactions")
+
+    class Config:
+        from_attributes = True
+
+
+class PowerReplayResponse(BaseModel):
+    """Simulator check against a past experiment's stored results"""
+    experiment_id: str
+    alpha: float
+    variant_a_rate: float
+    variant_b_rate: float
+    total_runs: int
+    checkpoints: list[ReplayCheckpointResponse]
+
+    class Config:
+        from_attributes = True
+
+
+class VariantProgress(BaseModel):
+    """Live reaction counts for one experiment variant"""
+    phrase: str
+    reactions: int
+    joys: int
+    win_rate: float | None
+
+
+class ExperimentProgress(BaseModel):
+    """Live progress of an experiment, pushed to event stream watchers as reactions are recorded"""
+    experiment_id: str
+    status: Literal["active", "completed"]
+    target_runs: int
+    variant_a: VariantProgress
+    variant_b: VariantProgress
+
+
+class ChampionChangedEvent(BaseModel):
+    """Pushed to event stream watchers when the champion phrase is updated"""
+    phrase: str
+    updated_at: datetime
@@ -0,0 +1,205 @@
+"""In-process broadcaster for live experiment progress (Server-Sent Events)
+
+Reactions update an in-memory tally for each experiment that has watchers, and the resulting event
+is encoded once and handed to every watcher's queue - so a hundred watchers cost one update, not a
+hundred database polls. Experiments without watchers cost a dictionary lookup per reaction.
+
+All methods must be called from the event loop thread (the webhook and experiment tasks already are).
+"""
+import asyncio
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..db.models import AffirmationResult, Experiment, ExperimentStatus
+from ..db.session import SessionLocal
+from ..schemas.models import ChampionChangedEvent, ExperimentProgress, ExperimentResponse, VariantProgress
+
+# Events buffered per watcher - a slow watcher loses its oldest progress events, never the latest
+WATCHER_QUEUE_SIZE: int = 100
+
+# Seconds between keepalive comments on an idle stream, so proxies don't drop the connection
+KEEPALIVE_INTERVAL: float = 15.0
+
+# Reconnection delay sent with the final `completed` event - EventSource reconnects whenever a stream ends,
+# so a finished experiment tells it to wait a day instead of the default ~3s
+FINAL_RETRY_MS: int = 24 * 60 * 60 * 1000
+
+
+@dataclass
+class _LiveProgress:
+    """Running reaction tally for an experiment with watchers"""
+    experiment_id: str
+    status: str
+    target_runs: int
+    variant_a_phrase: str
+    variant_b_phrase: str
+    variant_a_reactions: int = 0
+    variant_a_joys: int = 0
+    variant_b_reactions: int = 0
+    variant_b_joys: int = 0
+
+    def to_event(self) -> str:
+        progress = ExperimentProgress(
+            experiment_id=self.experiment_id,
+            status=self.status,
+            target_runs=self.target_runs,
+            variant_a=_variant_progress(self.variant_a_phrase, self.variant_a_reactions, self.variant_a_joys),
+            variant_b=_variant_progress(self.variant_b_phrase, self.variant_b_reactions, self.variant_b_joys)
+        )
+        return format_event("progress", progress.model_dump_json())
+
+
+def _variant_progress(phrase: str, reactions: int, joys: int) -> VariantProgress:
+    return VariantProgress(
+        phrase=phrase,
+        reactions=reactions,
+        joys=joys,
+        win_rate=joys / reactions if reactions > 0 else None
+    )
+
+
+def format_event(event: str, data: str, retry_ms: int | None = None) -> str:
+    """Encode a Server-Sent Event, optionally setting the client's reconnection delay"""
+    retry = f"retry: {retry_ms}\n" if retry_ms is not None else ""
+    return f"{retry}event: {event}\ndata: {data}\n\n"
+
+
+class ExperimentBroadcaster:
+    """Fans experiment progress, completion and champion changes out to event stream watchers"""
+
+    def __init__(self) -> None:
+        self._watchers: dict[str, set[asyncio.Queue[str | None]]] = {}
+        self._progress: dict[str, _LiveProgress] = {}
+
+    def subscribe(self, db: Session, experiment: Experiment) -> asyncio.Queue[str | None]:
+        """Start watching an experiment - the queue yields encoded events, then None when the stream ends
+
+        The first watcher of an experiment loads its reaction counts from the database once;
+        from then on they are updated in memory.
+        """
+        if experiment.id not in self._progress:
+            self._progress[experiment.id] = _load_progress(db, experiment)
+
+        queue: asyncio.Queue[str | None] = asyncio.Queue(maxsize=WATCHER_QUEUE_SIZE)
+        queue.put_nowait(self._progress[experiment.id].to_event())
+        self._watchers.setdefault(experiment.id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, experiment_id: str, queue: asyncio.Queue[str | None]) -> None:
+        """Stop watching - the tally is dropped along with the last watcher"""
+        watchers = self._watchers.get(experiment_id)
+        if watchers is None:
+            return
+
+        watchers.discard(queue)
+        if not watchers:
+            del self._watchers[experiment_id]
+            self._progress.pop(experiment_id, None)
+
+    def record_reaction(self, experiment_id: str, phrase: str, joy_sparked: bool, previous_joy: bool | None) -> None:
+        """Update the tally for a ferret reaction and push it to watchers
+
+        previous_joy is the earlier reaction if this affirmation already had a callback (see record_phrase_reaction).
+        """
+        progress = self._progress.get(experiment_id)
+        if progress is None:
+            return
+
+        reactions = 1 if previous_joy is None else 0
+        joys = int(joy_sparked) - int(previous_joy or False)
+        if phrase == progress.variant_a_phrase:
+            progress.variant_a_reactions += reactions
+            progress.variant_a_joys += joys
+        elif phrase == progress.variant_b_phrase:
+            progress.variant_b_reactions += reactions
+            progress.variant_b_joys += joys
+        else:
+            return
+
+        self._publish(experiment_id, progress.to_event())
+
+    def publish_completed(self, experiment: ExperimentResponse) -> None:
+        """Push an experiment's final results to its watchers"""
+        progress = self._progress.get(experiment.id)
+        if progress is None:
+            return
+
+        progress.status = experiment.status
+        self._publish(experiment.id, format_event("completed", experiment.model_dump_json(), FINAL_RETRY_MS))
+
+    def publish_champion_changed(self, phrase: str, updated_at: datetime) -> None:
+        """Push a champion phrase change to every watcher"""
+        event = format_event("champion", ChampionChangedEvent(phrase=phrase, updated_at=updated_at).model_dump_json())
+        for experiment_id in self._watchers:
+            self._publish(experiment_id, event)
+
+    def close_experiment(self, experiment_id: str) -> None:
+        """End every watcher's stream for an experiment"""
+        self._publish(experiment_id, None)
+
+    def _publish(self, experiment_id: str, event: str | None) -> None:
+        for queue in self._watchers.get(experiment_id, ()):
+            if queue.full():
+                # Progress events are snapshots, so a slow watcher only needs the newest ones
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+
+def _load_progress(db: Session, experiment: Experiment) -> _LiveProgress:
+    """Current reaction counts per variant, from the stored affirmation results"""
+    progress = _LiveProgress(
+        experiment_id=experiment.id,
+        status=experiment.status,
+        target_runs=experiment.target_runs,
+        variant_a_phrase=experiment.variant_a_phrase,
+        variant_b_phrase=experiment.variant_b_phrase
+    )
+
+    rows = db.query(
+        AffirmationResult.words_of_affirmation,
+        func.count(AffirmationResult.affirmation_id),
+        func.sum(AffirmationResult.joy_sparked)
+    ).filter(
+        AffirmationResult.experiment_id == experiment.id,
+        AffirmationResult.callback_received_at.isnot(None)
+    ).group_by(AffirmationResult.words_of_affirmation).all()
+
+    for phrase, reactions, joys in rows:
+        if phrase == experiment.variant_a_phrase:
+            progress.variant_a_reactions, progress.variant_a_joys = reactions, int(joys or 0)
+        elif phrase == experiment.variant_b_phrase:
+            progress.variant_b_reactions, progress.variant_b_joys = reactions, int(joys or 0)
+
+    return progress
+
+
+# Shared broadcaster for the whole app
+experiment_broadcaster = ExperimentBroadcaster()
+
+
+async def stream_experiment_events(experiment_id: str) -> AsyncIterator[str]:
+    """Server-Sent Events for an active experiment, until it completes or the client disconnects"""
+    # Subscribe inside the generator so unsubscribe is guaranteed to run whenever subscribe did
+    with SessionLocal() as db:
+        experiment = db.query(Experiment).filter(Experiment.id == experiment_id).first()
+        # Completed between the route's check and now - the client reconnects and gets the final results
+        if not experiment or experiment.status != ExperimentStatus.ACTIVE.value:
+            return
+        queue = experiment_broadcaster.subscribe(db, experiment)
+
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_INTERVAL)
+            except TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+
+            if event is None:
+                return
+            yield event
+    finally:
+        experiment_broadcaster.unsubscribe(experiment_id, queue)
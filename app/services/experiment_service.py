@@ -3,20 +3,27 @@ import uuid
 import random
 import asyncio
 from datetime import datetime
+from pydantic import TypeAdapter
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
 from ..db.models import Experiment, AffirmationResult, ChampionPhrase, ExperimentStatus, Variant
 from ..schemas.models import ExperimentResponse
-from .ferret_service import get_words_of_affirmation, process_affirmation_and_callback, create_affirmation_record
+from .ferret_service import process_affirmation_and_callback, create_affirmation_record
+from .traffic_service import assign_variant, invalidate_bucket_table
+from .version_service import invalidate_versions
+from .event_service import experiment_broadcaster
 
 
 def create_experiment(
     db: Session,
     name: str,
     variant_b_phrase: str,
-    target_runs: int
+    target_runs: int,
+    traffic_start: int,
+    traffic_end: int
 ) -> Experiment:
-    """Create a new experiment with active status
+    """Create a new experiment with active status on the traffic slice [traffic_start, traffic_end)
     Variant A is automatically set to the current champion phrase"""
     # Get current champion phrase - this will always be variant A
     champion = db.query(ChampionPhrase).filter(ChampionPhrase.id == 1).first()
@@ -30,16 +37,22 @@ def create_experiment(
         variant_b_phrase=variant_b_phrase,
         status=ExperimentStatus.ACTIVE.value,
         target_runs=target_runs,
+        traffic_start=traffic_start,
+        traffic_end=traffic_end,
+        version=1,
         created_at=datetime.now()
     )
 
     db.add(experiment)
     db.commit()
     db.refresh(experiment)
+    invalidate_bucket_table()
+    invalidate_versions()
 
     print(f"[EXPERIMENT] 🧪 Created experiment '{name}' (ID: {experiment.id}, Status: active)")
     print(f"  Variant A (Champion): '{variant_a_phrase}'")
     print(f"  Variant B (Challenger): '{variant_b_phrase}'")
+    print(f"  Traffic buckets: [{traffic_start}, {traffic_end})")
 
     return experiment
 
@@ -55,9 +68,11 @@ def complete_experiment(db: Session, experiment_id: str) -> None:
 
     print(f"[EXPERIMENT] 🏁 Completing experiment '{experiment.name}' (ID: {experiment_id})")
 
-    # Query all affirmation results for this experiment
+    # Query all affirmation results for this experiment that got a ferret reaction
+    # (affirmations whose Spark call failed have no callback and would otherwise count as losses)
     results = db.query(AffirmationResult).filter(
-        AffirmationResult.experiment_id == experiment_id
+        AffirmationResult.experiment_id == experiment_id,
+        AffirmationResult.callback_received_at.isnot(None)
     ).all()
 
     # Separate by variant (determine by matching phrase)
@@ -85,32 +100,67 @@ def complete_experiment(db: Session, experiment_id: str) -> None:
     experiment.winning_variant = winning_variant.value
     experiment.status = ExperimentStatus.COMPLETED.value
     experiment.completed_at = datetime.now()
+    experiment.version += 1
 
     db.commit()
+    invalidate_bucket_table()
+    invalidate_versions()
+    experiment_broadcaster.publish_completed(build_experiment_response(experiment))
 
     print(f"[EXPERIMENT] 📊 Results:")
     print(f"  Variant A: {variant_a_wins}/{variant_a_total} ({variant_a_win_rate:.1%})")
     print(f"  Variant B: {variant_b_wins}/{variant_b_total} ({variant_b_win_rate:.1%})")
     print(f"  Winner: Variant {winning_variant.value} - '{winning_phrase}'")
 
-    # Update champion phrase with winner
-    update_champion_phrase(db, winning_phrase)
+    # Only a winning challenger changes the champion, and only if no other experiment has replaced
+    # this experiment's variant A (the champion when it was created) in the meantime
+    if winning_variant == Variant.B:
+        update_champion_phrase(db, winning_phrase, expected_phrase=experiment.variant_a_phrase)
+    else:
+        print(f"[CHAMPION] 🏆 Champion '{experiment.variant_a_phrase}' held its title")
 
+    # Results and champion are final, end the experiment's event streams
+    experiment_broadcaster.close_experiment(experiment_id)
 
-def update_champion_phrase(db: Session, new_phrase: str) -> None:
-    """Update the champion phrase in the database"""
-    champion = db.query(ChampionPhrase).filter(ChampionPhrase.id == 1).first()
 
-    if champion:
-        old_phrase = champion.phrase
-        champion.phrase = new_phrase
-        champion.updated_at = datetime.now()
-        db.commit()
-        print(f"[CHAMPION] 👑 Updated champion phrase:")
-        print(f"  Old: '{old_phrase}'")
-        print(f"  New: '{new_phrase}'")
-    else:
-        print("[CHAMPION] ⚠️  No champion phrase found in database!")
+def update_champion_phrase(db: Session, new_phrase: str, expected_phrase: str) -> bool:
+    """Replace the champion phrase, but only while it is still expected_phrase
+
+    Done as a conditional UPDATE, so when concurrent experiments finish at the same time only
+    one of them can replace a given champion.
+
+    Returns:
+        bool: Whether the champion phrase was replaced
+    """
+    if new_phrase == expected_phrase:
+        # Nothing changes - leave updated_at (and so the champion ETag) alone and don't announce a change
+        print(f"[CHAMPION] 🏆 Champion '{expected_phrase}' is unchanged")
+        return False
+
+    updated_at = datetime.now()
+    result = db.execute(
+        update(ChampionPhrase).where(
+            ChampionPhrase.id == 1,
+            ChampionPhrase.phrase == expected_phrase
+        ).values(phrase=new_phrase, updated_at=updated_at)
+    )
+    db.commit()
+
+    if result.rowcount == 0:
+        current_phrase = db.query(ChampionPhrase.phrase).filter(ChampionPhrase.id == 1).scalar()
+        if current_phrase is None:
+            print("[CHAMPION] ⚠️  No champion phrase found in database!")
+        else:
+            print(f"[CHAMPION] ⚠️  Not promoting '{new_phrase}': it beat '{expected_phrase}', "
+                  f"but another experiment has since made '{current_phrase}' champion")
+        return False
+
+    invalidate_versions()
+    experiment_broadcaster.publish_champion_changed(new_phrase, updated_at)
+    print(f"[CHAMPION] 👑 Updated champion phrase:")
+    print(f"  Old: '{expected_phrase}'")
+    print(f"  New: '{new_phrase}'")
+    return True
 
 
 async def execute_experiment(experiment_id: str, db: Session) -> None:
@@ -126,12 +176,13 @@ async def execute_experiment(experiment_id: str, db: Session) -> None:
 
     print(f"[EXPERIMENT] 🚀 Starting {experiment.target_runs} affirmations for experiment '{experiment.name}'")
 
-    # Create N async tasks with random 50/50 split
+    # Create N async tasks with a deterministic 50/50 split on the affirmation ID
     tasks = []
     for _ in range(experiment.target_runs):
-        phrase = get_words_of_affirmation(db)
         # Generate unique affirmation ID
         affirmation_id = str(uuid.uuid4())
+        variant = assign_variant(experiment_id, affirmation_id)
+        phrase = experiment.variant_a_phrase if variant == Variant.A else experiment.variant_b_phrase
 
         # Create database record with experiment tracking
         create_affirmation_record(
@@ -154,17 +205,15 @@ async def execute_experiment(experiment_id: str, db: Session) -> None:
     complete_experiment(db, experiment_id)
 
 
-def build_experiment_response(experiment: Experiment) -> ExperimentResponse:
-    """Build ExperimentResponse with calculated win rates"""
-    # Calculate win rates on-the-fly
-    variant_a_win_rate = None
-    variant_b_win_rate = None
+def calculate_win_rate(wins: int | None, total: int | None) -> float | None:
+    """Win rate for a variant, or None if it has no results yet"""
+    if total and total > 0:
+        return wins / total
+    return None
 
-    if experiment.variant_a_total and experiment.variant_a_total > 0:
-        variant_a_win_rate = experiment.variant_a_wins / experiment.variant_a_total
-    if experiment.variant_b_total and experiment.variant_b_total > 0:
-        variant_b_win_rate = experiment.variant_b_wins / experiment.variant_b_total
 
+def build_experiment_response(experiment: Experiment) -> ExperimentResponse:
+    """Build ExperimentResponse with calculated win rates"""
     return ExperimentResponse(
         id=experiment.id,
         name=experiment.name,
@@ -172,6 +221,8 @@ def build_experiment_response(experiment: Experiment) -> ExperimentResponse:
         variant_b_phrase=experiment.variant_b_phrase,
         status=experiment.status,
         target_runs=experiment.target_runs,
+        traffic_start=experiment.traffic_start,
+        traffic_end=experiment.traffic_end,
         created_at=experiment.created_at,
         completed_at=experiment.completed_at,
         winning_variant=experiment.winning_variant,
@@ -179,6 +230,52 @@ def build_experiment_response(experiment: Experiment) -> ExperimentResponse:
         variant_b_wins=experiment.variant_b_wins,
         variant_a_total=experiment.variant_a_total,
         variant_b_total=experiment.variant_b_total,
-        variant_a_win_rate=variant_a_win_rate,
-        variant_b_win_rate=variant_b_win_rate
+        variant_a_win_rate=calculate_win_rate(experiment.variant_a_wins, experiment.variant_a_total),
+        variant_b_win_rate=calculate_win_rate(experiment.variant_b_wins, experiment.variant_b_total)
     )
+
+
+# Validates list_experiment_payloads output against the declared response model in a single pass
+_EXPERIMENT_LIST_ADAPTER = TypeAdapter(list[ExperimentResponse])
+
+# Columns selected by list_experiment_payloads - matches the stored fields of ExperimentResponse
+EXPERIMENT_COLUMNS = (
+    Experiment.id,
+    Experiment.name,
+    Experiment.variant_a_phrase,
+    Experiment.variant_b_phrase,
+    Experiment.status,
+    Experiment.target_runs,
+    Experiment.traffic_start,
+    Experiment.traffic_end,
+    Experiment.created_at,
+    Experiment.completed_at,
+    Experiment.winning_variant,
+    Experiment.variant_a_wins,
+    Experiment.variant_b_wins,
+    Experiment.variant_a_total,
+    Experiment.variant_b_total,
+)
+
+
+def list_experiment_payloads(db: Session, status_filter: str | None = None) -> list[dict]:
+    """List experiments as plain dicts shaped like ExperimentResponse, newest first
+
+    Fast path for list endpoints: selects columns only (no ORM identity map) and validates the
+    whole list once in strict mode. Strict validation never coerces, so the dicts that passed
+    are exactly what gets encoded and they can go straight to an orjson response.
+    """
+    query = db.query(*EXPERIMENT_COLUMNS)
+
+    if status_filter:
+        query = query.filter(Experiment.status == status_filter)
+
+    payloads = []
+    for row in query.order_by(Experiment.created_at.desc()):
+        payload = row._asdict()
+        payload["variant_a_win_rate"] = calculate_win_rate(row.variant_a_wins, row.variant_a_total)
+        payload["variant_b_win_rate"] = calculate_win_rate(row.variant_b_wins, row.variant_b_total)
+        payloads.append(payload)
+
+    _EXPERIMENT_LIST_ADAPTER.validate_python(payloads, strict=True)
+    return payloads
@@ -4,38 +4,40 @@ import asyncio
 import random
 import traceback
 from datetime import datetime
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
-from ..db.models import AffirmationResult, ChampionPhrase, Experiment, ExperimentStatus, Variant
+from ..db.models import AffirmationResult, ChampionPhrase
 from ..db.session import SessionLocal
+from ..schemas.models import AffirmationHistoryItem
+from .phrase_service import record_phrase_send, record_phrase_reaction
+from .spark_client import spark_client, SparkJoyError
+from .traffic_service import find_experiment_for_affirmation, assign_variant
+from .event_service import experiment_broadcaster
 
 
-def get_words_of_affirmation(db: Session) -> str:
-    """Get words of affirmation - either from champion or from a running experiment.
+# Validates list_affirmation_history_payloads output against the declared response model in a single pass
+_HISTORY_LIST_ADAPTER = TypeAdapter(list[AffirmationHistoryItem])
+
+
+def get_words_of_affirmation(db: Session, affirmation_id: str) -> tuple[str, str | None]:
+    """Get words of affirmation - either from champion or from the experiment whose traffic slice the affirmation falls into.
 
     Returns:
-        str: Words of affirmation
-            - If no experiment is running: returns champion phrase
-            - If experiment is running: returns randomly selected variant (50/50 chance)
+        tuple[str, str | None]: Words of affirmation and the experiment ID they belong to
+            - If the affirmation is outside every active experiment's slice: champion phrase and None
+            - Otherwise: the variant deterministically assigned by hashing the affirmation ID (50/50 split)
     """
-    # Check if there's an active experiment
-    active_experiment = db.query(Experiment).filter(
-        Experiment.status == ExperimentStatus.ACTIVE.value
-    ).first()
+    experiment_slice = find_experiment_for_affirmation(db, affirmation_id)
 
-    if active_experiment:
-        # 50/50 chance between variant A and variant B
-        selected_variant = random.choice([Variant.A, Variant.B])
-
-        if selected_variant == Variant.A:
-            return active_experiment.variant_a_phrase
-        else:
-            return active_experiment.variant_b_phrase
+    if experiment_slice:
+        selected_variant = assign_variant(experiment_slice.experiment_id, affirmation_id)
+        return experiment_slice.phrase_for(selected_variant), experiment_slice.experiment_id
     else:
-        # No active experiment, use the champion phrase
+        # No experiment owns this slice of traffic, use the champion phrase
         champion = db.query(ChampionPhrase).filter(ChampionPhrase.id == 1).first()
 
-        return champion.phrase
+        return champion.phrase, None
 
 
 def create_affirmation_record(
@@ -47,14 +49,16 @@ def create_affirmation_record(
     """Create initial database record for new affirmation"""
     try:
         # Create a temporary record with joy_sparked=False (will be updated later)
+        created_at = datetime.now()
         db_affirmation = AffirmationResult(
             affirmation_id=affirmation_id,
             words_of_affirmation=words_of_affirmation,
             joy_sparked=False,  # Placeholder, will be updated
-            created_at=datetime.now(),
+            created_at=created_at,
             experiment_id=experiment_id
         )
         db.add(db_affirmation)
+        record_phrase_send(db, words_of_affirmation, created_at)
         db.commit()
         print(f"[DATABASE] 💾 Created affirmation record: {affirmation_id}")
     except Exception as e:
@@ -70,10 +74,19 @@ def update_affirmation_result(affirmation_id: str, joy_sparked: bool, db: Sessio
         ).first()
         
         if db_affirmation:
+            # Only a previously received callback has a meaningful joy_sparked value
+            previous_joy = db_affirmation.joy_sparked if db_affirmation.callback_received_at else None
+            record_phrase_reaction(db, db_affirmation.words_of_affirmation, joy_sparked, previous_joy)
+
             db_affirmation.joy_sparked = joy_sparked
             db_affirmation.callback_received_at = datetime.now()
             db.commit()
             print(f"[DATABASE] 💾 Updated affirmation result: {affirmation_id} (joy={joy_sparked})")
+
+            if db_affirmation.experiment_id:
+                experiment_broadcaster.record_reaction(
+                    db_affirmation.experiment_id, db_affirmation.words_of_affirmation, joy_sparked, previous_joy
+                )
         else:
             print(f"[DATABASE] ⚠️  Affirmation not found: {affirmation_id}")
     except Exception as e:
@@ -81,34 +94,55 @@ def update_affirmation_result(affirmation_id: str, joy_sparked: bool, db: Sessio
         db.rollback()
 
 
+def list_affirmation_history_payloads(db: Session, limit: int) -> list[dict]:
+    """Most recent affirmations as plain dicts shaped like AffirmationHistoryItem
+
+    Fast path for the history endpoint: selects columns only and validates the whole list once
+    in strict mode (no coercion, so the validated dicts are exactly what gets encoded), so rows
+    can go straight to an orjson response.
+    """
+    rows = db.query(
+        AffirmationResult.affirmation_id,
+        AffirmationResult.words_of_affirmation,
+        AffirmationResult.joy_sparked,
+        AffirmationResult.created_at,
+        AffirmationResult.callback_received_at
+    ).order_by(
+        AffirmationResult.created_at.desc()
+    ).limit(limit)
+
+    payloads = [row._asdict() for row in rows]
+    _HISTORY_LIST_ADAPTER.validate_python(payloads, strict=True)
+    return payloads
+
+
 async def process_affirmation_and_callback(affirmation_id: str, words_of_affirmation: str, webhook_url: str) -> None:
     """Background task that shares words with ferrets, waits for their reaction, then posts to webhook"""
     try:
-        # Share words with the fickle ferrets
+        # Share words with the fickle ferrets (rate limited, retried and circuit broken by the Spark client)
+        print(f"[FERRETS] 🦦 Sharing affirmation {affirmation_id} with our fickle ferrets...")
+        ferret_joy = await spark_client.spark_joy(words_of_affirmation)
+    except SparkJoyError as e:
+        # No reaction is recorded, so the affirmation stays without a callback and is left out of results
+        print(f"[FERRETS] ❌ No reaction for affirmation {affirmation_id}: {e}")
+        return
+
+    try:
+        # Ferrets are thinking... (they're very fickle and take their time)
+        delay = random.uniform(0.0, 1.0)
+        print(f"[FERRETS] 🤔 Ferrets are contemplating... ({delay:.2f} seconds)")
+        await asyncio.sleep(delay)
+
+        # Post ferret reaction to our webhook endpoint
+        callback_payload = {
+            "affirmation_id": affirmation_id,
+            "joy_sparked": ferret_joy,
+            "timestamp": datetime.now().isoformat()
+        }
+        print(f"[FERRETS] 📢 Posting ferret reaction to webhook...")
         async with httpx.AsyncClient(timeout=30.0) as client:
-            print(f"[FERRETS] 🦦 Sharing affirmation {affirmation_id} with our fickle ferrets...")
-            response = await client.post(
-                "https://spark-joy.local-services.workers.dev/spark",
-                json={"input": words_of_affirmation},
-                headers={"Content-Type": "application/json"}
-            )
-            ferret_joy = response.json()["result"]
-            
-            # Ferrets are thinking... (they're very fickle and take their time)
-            delay = random.uniform(0.0, 1.0)
-            print(f"[FERRETS] 🤔 Ferrets are contemplating... ({delay:.2f} seconds)")
-            await asyncio.sleep(delay)
-            
-            # Post ferret reaction to our webhook endpoint
-            callback_payload = {
-                "affirmation_id": affirmation_id,
-                "joy_sparked": ferret_joy,
-                "timestamp": datetime.now().isoformat()
-            }
-            print(f"[FERRETS] 📢 Posting ferret reaction to webhook...")
             await client.post(webhook_url, json=callback_payload)
-            print(f"[FERRETS] {'✨ Ferrets sparked with joy!' if ferret_joy else '😔 Ferrets remain unimpressed.'} (ID: {affirmation_id})")
+        print(f"[FERRETS] {'✨ Ferrets sparked with joy!' if ferret_joy else '😔 Ferrets remain unimpressed.'} (ID: {affirmation_id})")
     except Exception as e:
         print(f"[FERRETS] ❌ Error processing affirmation {affirmation_id}: {type(e).__name__}: {e}")
         print(f"[FERRETS] 📋 Traceback: {traceback.format_exc()}")
-
@@ -0,0 +1,119 @@
+"""Service for maintaining lifetime per-phrase joy statistics"""
+import math
+from datetime import datetime
+from sqlalchemy import func, case, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..db.models import PhraseStats, AffirmationResult
+
+# z-score for a 95% confidence interval
+CONFIDENCE_Z: float = 1.96
+
+
+def wilson_interval(joys: int, reactions: int, z: float = CONFIDENCE_Z) -> tuple[float, float]:
+    """Wilson score interval for a joy rate - well behaved for small samples, unlike the normal approximation"""
+    if reactions == 0:
+        return 0.0, 0.0
+
+    rate = joys / reactions
+    z2 = z * z
+    denominator = 1 + z2 / reactions
+    centre = (rate + z2 / (2 * reactions)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / reactions + z2 / (4 * reactions * reactions)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def record_phrase_send(db: Session, phrase: str, sent_at: datetime) -> None:
+    """Count a send for a phrase. Does not commit - the caller commits alongside the affirmation record"""
+    # Upsert with SQL-side increments, so concurrent workers never lose a count
+    statement = sqlite_insert(PhraseStats).values(
+        phrase=phrase,
+        sends=1,
+        reactions=0,
+        joys=0,
+        joy_rate_lower=0.0,
+        joy_rate_upper=0.0,
+        last_seen_at=sent_at
+    ).on_conflict_do_update(
+        index_elements=[PhraseStats.phrase],
+        set_={
+            "sends": PhraseStats.sends + 1,
+            "last_seen_at": func.max(func.coalesce(PhraseStats.last_seen_at, sent_at), sent_at)
+        }
+    )
+    db.execute(statement)
+
+
+def record_phrase_reaction(db: Session, phrase: str, joy_sparked: bool, previous_joy: bool | None) -> None:
+    """Count a ferret reaction for a phrase. Does not commit - the caller commits alongside the affirmation update
+
+    previous_joy is the earlier reaction if this affirmation already had a callback, so a repeated
+    webhook delivery corrects the joy count instead of double counting.
+    """
+    reactions = 1 if previous_joy is None else 0
+    joys = int(joy_sparked) - int(previous_joy or False)
+
+    # SQL-side increments, then the interval is recomputed from the row as updated. SQLite holds the
+    # write lock from the first write until commit, so no other worker can change the row in between.
+    statement = sqlite_insert(PhraseStats).values(
+        phrase=phrase,
+        sends=0,
+        reactions=reactions,
+        joys=max(joys, 0),
+        joy_rate_lower=0.0,
+        joy_rate_upper=0.0
+    ).on_conflict_do_update(
+        index_elements=[PhraseStats.phrase],
+        set_={
+            "reactions": PhraseStats.reactions + reactions,
+            "joys": PhraseStats.joys + joys
+        }
+    ).returning(PhraseStats.joys, PhraseStats.reactions)
+    updated_joys, updated_reactions = db.execute(statement).one()
+
+    joy_rate_lower, joy_rate_upper = wilson_interval(updated_joys, updated_reactions)
+    db.execute(
+        update(PhraseStats).where(PhraseStats.phrase == phrase).values(
+            joy_rate_lower=joy_rate_lower,
+            joy_rate_upper=joy_rate_upper
+        )
+    )
+
+
+def get_phrase_leaderboard(db: Session, limit: int) -> list[PhraseStats]:
+    """Top phrases ranked by the lower bound of their joy rate interval (served from the index)"""
+    return db.query(PhraseStats).order_by(
+        PhraseStats.joy_rate_lower.desc()
+    ).limit(limit).all()
+
+
+def rebuild_phrase_stats(db: Session) -> int:
+    """Rebuild the stats table from affirmation_results - used once to backfill existing databases
+
+    Returns:
+        int: Number of phrases written
+    """
+    rows = db.query(
+        AffirmationResult.words_of_affirmation,
+        func.count(AffirmationResult.affirmation_id),
+        func.count(AffirmationResult.callback_received_at),
+        func.sum(case((AffirmationResult.callback_received_at.isnot(None) & AffirmationResult.joy_sparked, 1), else_=0)),
+        func.max(AffirmationResult.created_at)
+    ).group_by(AffirmationResult.words_of_affirmation).all()
+
+    db.query(PhraseStats).delete()
+    for phrase, sends, reactions, joys, last_seen_at in rows:
+        joy_rate_lower, joy_rate_upper = wilson_interval(joys, reactions)
+        db.add(PhraseStats(
+            phrase=phrase,
+            sends=sends,
+            reactions=reactions,
+            joys=joys,
+            joy_rate_lower=joy_rate_lower,
+            joy_rate_upper=joy_rate_upper,
+            last_seen_at=last_seen_at
+        ))
+    db.commit()
+
+    return len(rows)
@@ -0,0 +1,236 @@
+"""Power analysis for choosing an experiment's target_runs
+
+An experiment "detects" the challenger when variant B has the higher joy rate and a two-sided
+two-proportion z-test is significant at alpha. Required runs are first estimated with the normal
+approximation, then refined with vectorized Monte Carlo over simulated experiments that split
+traffic 50/50 the same way real experiments do.
+"""
+import math
+from dataclasses import dataclass, field
+from statistics import NormalDist
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..db.models import AffirmationResult, ChampionPhrase, Experiment, PhraseStats
+
+# Simulated experiments per power estimate while searching, and for the final check
+SEARCH_SIMULATIONS: int = 100_000
+FINAL_SIMULATIONS: int = 200_000
+
+# The final check must clear the requested power by this many standard errors (one-sided ~97.5%)
+FINAL_CHECK_Z: float = 1.96
+
+# Fractions of a past experiment's runs that are replayed when checking the estimates
+REPLAY_FRACTIONS: tuple[float, ...] = (0.1, 0.25, 0.5, 0.75)
+
+
+@dataclass
+class PowerEstimate:
+    """Recommended target_runs for detecting a given effect"""
+    baseline_rate: float
+    challenger_rate: float
+    alpha: float
+    power: float
+    analytic_target_runs: int
+    target_runs: int
+    simulated_power: float
+    simulations: int
+
+
+@dataclass
+class ReplayCheckpoint:
+    """Detection rate at a given number of runs: predicted by simulation vs replayed from stored results"""
+    runs: int
+    predicted_power: float
+    replayed_power: float
+
+
+@dataclass
+class PowerReplay:
+    """Replay of a past experiment's stored affirmation results"""
+    experiment_id: str
+    alpha: float
+    variant_a_rate: float
+    variant_b_rate: float
+    total_runs: int
+    checkpoints: list[ReplayCheckpoint] = field(default_factory=list)
+
+
+def _detected(wins_a: np.ndarray, n_a: np.ndarray, wins_b: np.ndarray, n_b: np.ndarray, alpha: float) -> np.ndarray:
+    """Vectorized check for variant B winning with a significant two-proportion z-test"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate_a = wins_a / n_a
+        rate_b = wins_b / n_b
+        pooled = (wins_a + wins_b) / (n_a + n_b)
+        standard_error = np.sqrt(pooled * (1 - pooled) * (1 / n_a + 1 / n_b))
+        z = (rate_b - rate_a) / standard_error
+
+    z_critical = NormalDist().inv_cdf(1 - alpha / 2)
+    # NaN z (an empty variant or zero variance) compares False, i.e. not detected
+    return z > z_critical
+
+
+def analytic_target_runs(baseline_rate: float, challenger_rate: float, alpha: float, power: float) -> int:
+    """Total runs (both variants) from the normal approximation for two proportions"""
+    z_alpha = NormalDist().inv_cdf(1 - alpha / 2)
+    z_beta = NormalDist().inv_cdf(power)
+    pooled = (baseline_rate + challenger_rate) / 2
+    effect = challenger_rate - baseline_rate
+
+    per_variant = (
+        z_alpha * math.sqrt(2 * pooled * (1 - pooled))
+        + z_beta * math.sqrt(baseline_rate * (1 - baseline_rate) + challenger_rate * (1 - challenger_rate))
+    ) ** 2 / effect ** 2
+    return 2 * math.ceil(per_variant)
+
+
+def simulate_power(
+    baseline_rate: float,
+    challenger_rate: float,
+    target_runs: int,
+    alpha: float,
+    simulations: int = FINAL_SIMULATIONS,
+    rng: np.random.Generator | None = None
+) -> float:
+    """Fraction of simulated experiments of target_runs affirmations that detect the challenger"""
+    rng = rng or np.random.default_rng()
+
+    n_a = rng.binomial(target_runs, 0.5, size=simulations)
+    n_b = target_runs - n_a
+    wins_a = rng.binomial(n_a, baseline_rate)
+    wins_b = rng.binomial(n_b, challenger_rate)
+    return float(_detected(wins_a, n_a, wins_b, n_b, alpha).mean())
+
+
+def estimate_target_runs(
+    baseline_rate: float,
+    effect_size: float,
+    alpha: float = 0.05,
+    power: float = 0.8,
+    rng: np.random.Generator | None = None
+) -> PowerEstimate:
+    """Smallest target_runs whose simulated power reaches the requested power
+
+    Bisection on simulated power is noisy, and at small run counts power saws up and down with the
+    discrete 50/50 splits, so the result is stepped up until an independent final check clears the
+    requested power by FINAL_CHECK_Z standard errors.
+
+    Raises:
+        ValueError: The baseline rate plus effect size is not a valid joy rate
+    """
+    challenger_rate = baseline_rate + effect_size
+    if not 0.0 < baseline_rate < 1.0 or not 0.0 < challenger_rate <= 1.0 or effect_size <= 0.0:
+        raise ValueError(
+            f"Baseline rate {baseline_rate:.3f} plus effect size {effect_size:.3f} must stay within (0, 1]"
+        )
+
+    rng = rng or np.random.default_rng()
+    analytic = analytic_target_runs(baseline_rate, challenger_rate, alpha, power)
+
+    def reaches_power(runs: int) -> bool:
+        return simulate_power(baseline_rate, challenger_rate, runs, alpha, SEARCH_SIMULATIONS, rng) >= power
+
+    # The analytic estimate is usually within a few percent, so bracket tightly around it
+    # (widening if needed) and bisect on simulated power
+    low, high = max(2, int(analytic * 0.9)), max(4, int(analytic * 1.1))
+    while not reaches_power(high):
+        low, high = high, high * 2
+    while low > 2 and reaches_power(low):
+        low, high = max(2, low // 2), low
+    while high - low > max(2, high // 100):
+        middle = (low + high) // 2
+        if reaches_power(middle):
+            high = middle
+        else:
+            low = middle
+
+    step = max(1, high // 100)
+    simulated_power = simulate_power(baseline_rate, challenger_rate, high, alpha, FINAL_SIMULATIONS, rng)
+    while simulated_power - FINAL_CHECK_Z * math.sqrt(simulated_power * (1 - simulated_power) / FINAL_SIMULATIONS) < power:
+        high += step
+        simulated_power = simulate_power(baseline_rate, challenger_rate, high, alpha, FINAL_SIMULATIONS, rng)
+
+    return PowerEstimate(
+        baseline_rate=baseline_rate,
+        challenger_rate=challenger_rate,
+        alpha=alpha,
+        power=power,
+        analytic_target_runs=analytic,
+        target_runs=high,
+        simulated_power=simulated_power,
+        simulations=FINAL_SIMULATIONS
+    )
+
+
+def get_champion_joy_rate(db: Session) -> float | None:
+    """Lifetime joy rate of the current champion phrase, or None if it has no reactions yet"""
+    champion = db.query(ChampionPhrase).filter(ChampionPhrase.id == 1).first()
+    stats = db.query(PhraseStats).filter(PhraseStats.phrase == champion.phrase).first()
+
+    if stats and stats.reactions > 0:
+        return stats.joys / stats.reactions
+    return None
+
+
+def replay_experiment(
+    db: Session,
+    experiment_id: str,
+    alpha: float = 0.05,
+    simulations: int = FINAL_SIMULATIONS,
+    rng: np.random.Generator | None = None
+) -> PowerReplay | None:
+    """Check the simulator against a past experiment's stored results
+
+    For each fraction of the experiment's runs, subsamples the stored outcomes without replacement
+    (i.e. re-runs a smaller experiment on the real reactions) and compares how often that detects
+    variant B with the power the simulator predicts at the observed joy rates.
+
+    Returns:
+        PowerReplay | None: None if the experiment doesn't exist
+    """
+    experiment = db.query(Experiment).filter(Experiment.id == experiment_id).first()
+    if not experiment:
+        return None
+
+    rng = rng or np.random.default_rng()
+    results = db.query(
+        AffirmationResult.words_of_affirmation,
+        AffirmationResult.joy_sparked
+    ).filter(
+        AffirmationResult.experiment_id == experiment_id,
+        AffirmationResult.callback_received_at.isnot(None)
+    ).all()
+
+    total_a = sum(1 for r in results if r.words_of_affirmation == experiment.variant_a_phrase)
+    total_b = sum(1 for r in results if r.words_of_affirmation == experiment.variant_b_phrase)
+    joys_a = sum(1 for r in results if r.words_of_affirmation == experiment.variant_a_phrase and r.joy_sparked)
+    joys_b = sum(1 for r in results if r.words_of_affirmation == experiment.variant_b_phrase and r.joy_sparked)
+
+    replay = PowerReplay(
+        experiment_id=experiment_id,
+        alpha=alpha,
+        variant_a_rate=joys_a / total_a if total_a else 0.0,
+        variant_b_rate=joys_b / total_b if total_b else 0.0,
+        total_runs=total_a + total_b
+    )
+    if total_a == 0 or total_b == 0:
+        return replay
+
+    for fraction in REPLAY_FRACTIONS:
+        runs = int(replay.total_runs * fraction)
+        if runs < 2:
+            continue
+
+        # Split the replayed runs 50/50 like a real experiment, capped by what was stored per variant
+        n_a = np.minimum(rng.binomial(runs, 0.5, size=simulations), total_a)
+        n_b = np.minimum(runs - n_a, total_b)
+        wins_a = rng.hypergeometric(joys_a, total_a - joys_a, np.maximum(n_a, 1)) * (n_a > 0)
+        wins_b = rng.hypergeometric(joys_b, total_b - joys_b, np.maximum(n_b, 1)) * (n_b > 0)
+
+        replay.checkpoints.append(ReplayCheckpoint(
+            runs=runs,
+            predicted_power=simulate_power(replay.variant_a_rate, replay.variant_b_rate, runs, alpha, simulations, rng),
+            replayed_power=float(_detected(wins_a, n_a, wins_b, n_b, alpha).mean())
+        ))
+
+    return replay
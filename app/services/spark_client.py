@@ -0,0 +1,300 @@
+"""Resilient client for the external Spark Joy API
+
+Every call goes through three layers:
+    1. Circuit breaker - fails fast while the Spark API is known to be down
+    2. Adaptive concurrency limiter (AIMD) - caps in-flight calls at whatever the upstream can sustain
+    3. Jittered exponential retries - for timeouts, connection errors and 5xx/429 responses
+"""
+import asyncio
+import random
+import statistics
+import time
+from enum import Enum
+import httpx
+
+SPARK_API_URL: str = "https://spark-joy.local-services.workers.dev/spark"
+
+
+class SparkJoyError(Exception):
+    """Raised when the Spark Joy API could not produce a result"""
+
+
+class CircuitOpenError(SparkJoyError):
+    """Raised when the circuit breaker is rejecting calls"""
+
+
+class CircuitState(str, Enum):
+    """Circuit breaker states"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets a single trial call through once reset_timeout has passed"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow_request(self) -> bool:
+        """Whether a call may go out now - claims the trial slot when half-open"""
+        if self.state == CircuitState.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self.state = CircuitState.HALF_OPEN
+            print("[SPARK] 🔌 Circuit half-open, sending a trial request")
+
+        if self.state == CircuitState.CLOSED:
+            return True
+        if self.state == CircuitState.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self.state != CircuitState.CLOSED:
+            print("[SPARK] ✅ Circuit closed, Spark API has recovered")
+        self.state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._consecutive_failures += 1
+        self._trial_in_flight = False
+        if self.state == CircuitState.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            if self.state != CircuitState.OPEN:
+                print(f"[SPARK] 🚫 Circuit open for {self.reset_timeout:.0f}s after {self._consecutive_failures} failures")
+            self.state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency limit driven by observed latency
+
+    Completed calls are grouped into sampling windows of about one limit's worth of calls - roughly one
+    round trip. At the end of each window the limit grows by one while the window's median latency stays
+    near the baseline (the best window median seen recently), and shrinks multiplicatively once if any
+    call in the window failed or the median climbed past latency_tolerance times the baseline - i.e. when
+    requests start queueing upstream. Comparing medians rather than single samples keeps ordinary latency
+    jitter from reading as congestion.
+
+    Callers wait for a slot for at most acquire_timeout seconds, and at most max_waiters callers may wait
+    at once - beyond that SparkJoyError is raised rather than letting the backlog grow without bound.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 20,
+        min_limit: int = 1,
+        max_limit: int = 500,
+        latency_tolerance: float = 2.0,
+        backoff_ratio: float = 0.9,
+        baseline_window: float = 30.0,
+        min_window_samples: int = 10,
+        acquire_timeout: float = 30.0,
+        max_waiters: int = 1000
+    ) -> None:
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.backoff_ratio = backoff_ratio
+        self.baseline_window = baseline_window
+        self.min_window_samples = min_window_samples
+        self.acquire_timeout = acquire_timeout
+        self.max_waiters = max_waiters
+        self.in_flight = 0
+        self.waiting = 0
+        self._samples: list[float] = []
+        self._failures = 0
+        self._window_median: float | None = None
+        self._previous_window_median: float | None = None
+        self._baseline_started_at = time.monotonic()
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        """Wait for a free slot under the current limit
+
+        Raises:
+            SparkJoyError: Too many callers are already waiting, or no slot freed up within acquire_timeout
+        """
+        async with self._condition:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return
+            if self.waiting >= self.max_waiters:
+                raise SparkJoyError(f"Spark API concurrency queue is full ({self.waiting} waiting)")
+
+            self.waiting += 1
+            try:
+                async with asyncio.timeout(self.acquire_timeout):
+                    await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            except TimeoutError:
+                raise SparkJoyError(f"Timed out after {self.acquire_timeout:.0f}s waiting for a Spark API slot") from None
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+
+    async def release(self, latency: float | None) -> None:
+        """Free a slot and adjust the limit - latency is None when the call failed"""
+        async with self._condition:
+            self.in_flight -= 1
+            self._update_limit(latency)
+            self._condition.notify_all()
+
+    async def release_unused(self) -> None:
+        """Free a slot that was never used for a call, leaving the limit unchanged"""
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def _update_limit(self, latency: float | None) -> None:
+        if latency is None:
+            self._failures += 1
+        else:
+            self._samples.append(latency)
+
+        if self._failures + len(self._samples) < max(self.min_window_samples, int(self.limit)):
+            return
+
+        # End of a sampling window - at most one adjustment per window
+        congested = False
+        if self._samples:
+            median = statistics.median(self._samples)
+            baseline = self._baseline_latency()
+            self._record_median(median)
+            congested = median > baseline * self.latency_tolerance
+
+        if self._failures or congested:
+            self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1)
+
+        self._samples = []
+        self._failures = 0
+
+    def _record_median(self, median: float) -> None:
+        """Track the lowest window median per baseline window - the baseline survives overload but follows a permanently slower upstream"""
+        now = time.monotonic()
+        if now - self._baseline_started_at >= self.baseline_window:
+            self._previous_window_median = self._window_median
+            self._window_median = None
+            self._baseline_started_at = now
+        if self._window_median is None or median < self._window_median:
+            self._window_median = median
+
+    def _baseline_latency(self) -> float:
+        """Best window median seen over the current and previous baseline windows"""
+        candidates = [m for m in (self._window_median, self._previous_window_median) if m is not None]
+        return min(candidates) if candidates else float("inf")
+
+
+class SparkClient:
+    """Client for the Spark Joy API with a shared connection pool"""
+
+    def __init__(
+        self,
+        url: str = SPARK_API_URL,
+        timeout: float = 10.0,
+        max_attempts: int = 3,
+        retry_base_delay: float = 0.5,
+        retry_max_delay: float = 5.0
+    ) -> None:
+        self.url = url
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.limiter = AdaptiveConcurrencyLimiter()
+        self.breaker = CircuitBreaker()
+        self._client: httpx.AsyncClient | None = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            # Enough connections for the limiter's maximum, so calls never queue inside httpx for a
+            # connection - that wait would be measured as Spark API latency and fight the AIMD loop
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.limiter.max_limit,
+                    max_keepalive_connections=self.limiter.max_limit
+                )
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the shared connection pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def spark_joy(self, words_of_affirmation: str) -> bool:
+        """Ask the ferrets whether the words spark joy, retrying transient failures
+
+        Every failure, including unexpected httpx errors, surfaces as SparkJoyError.
+
+        Raises:
+            CircuitOpenError: The circuit breaker is open
+            SparkJoyError: All attempts failed, or no concurrency slot was available
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return await self._attempt(words_of_affirmation)
+            except CircuitOpenError:
+                raise
+            except (httpx.HTTPError, httpx.InvalidURL, SparkJoyError) as e:
+                if attempt == self.max_attempts or not _is_retryable(e):
+                    raise SparkJoyError(f"Spark API failed after {attempt} attempt(s): {type(e).__name__}: {e}") from e
+
+                # Full jitter keeps retries from a burst of failures from arriving together
+                delay = random.uniform(0.0, min(self.retry_max_delay, self.retry_base_delay * 2 ** (attempt - 1)))
+                print(f"[SPARK] 🔁 Attempt {attempt} failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+        raise SparkJoyError("Spark API was not called")  # Only reachable with max_attempts < 1
+
+    async def _attempt(self, words_of_affirmation: str) -> bool:
+        """A single call, gated by the circuit breaker and the concurrency limiter"""
+        await self.limiter.acquire()
+
+        # Checked after queueing for a slot, so waiters see a circuit that opened while they waited
+        if not self.breaker.allow_request():
+            await self.limiter.release_unused()
+            raise CircuitOpenError("Spark API circuit is open")
+
+        latency = None
+        try:
+            start = time.monotonic()
+            response = await self._get_client().post(
+                self.url,
+                json={"input": words_of_affirmation},
+                headers={"Content-Type": "application/json"}
+            )
+            response.raise_for_status()
+            result = bool(response.json()["result"])
+            latency = time.monotonic() - start
+        except (ValueError, KeyError, TypeError) as e:
+            raise SparkJoyError(f"Unexpected Spark API response: {e}") from e
+        finally:
+            # Runs on cancellation too, so a half-open trial slot is never left claimed
+            if latency is None:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            await self.limiter.release(latency)
+
+        return result
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Timeouts, connection errors, 429 and 5xx are worth retrying - other 4xx and bad payloads are not"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+# Shared client for the whole app so the limiter and breaker see every call
+spark_client = SparkClient()
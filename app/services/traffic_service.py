@@ -0,0 +1,94 @@
+"""Deterministic hash-based traffic splitting for concurrent experiments
+
+Each affirmation ID hashes to one of TRAFFIC_BUCKETS buckets, and each active experiment owns a
+disjoint [traffic_start, traffic_end) range of buckets. A second hash, salted with the experiment ID,
+picks the variant. Assignment only depends on the IDs, so it is reproducible and identical across
+workers without any shared state.
+"""
+import hashlib
+import time
+from dataclasses import dataclass
+from sqlalchemy.orm import Session
+
+from ..db.models import Experiment, ExperimentStatus, Variant, TRAFFIC_BUCKETS
+
+# How long a worker trusts its bucket table before reloading it, to pick up experiments
+# created or completed by other workers
+BUCKET_TABLE_TTL: float = 5.0
+
+
+@dataclass(frozen=True)
+class ExperimentSlice:
+    """The parts of an active experiment needed to serve an affirmation"""
+    experiment_id: str
+    variant_a_phrase: str
+    variant_b_phrase: str
+
+    def phrase_for(self, variant: Variant) -> str:
+        return self.variant_a_phrase if variant == Variant.A else self.variant_b_phrase
+
+
+def _stable_hash(salt: str, affirmation_id: str) -> int:
+    """64-bit hash that is stable across processes (unlike the built-in hash())"""
+    digest = hashlib.blake2b(f"{salt}:{affirmation_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def traffic_bucket(affirmation_id: str) -> int:
+    """Bucket in [0, TRAFFIC_BUCKETS) that an affirmation falls into"""
+    return _stable_hash("traffic", affirmation_id) % TRAFFIC_BUCKETS
+
+
+def assign_variant(experiment_id: str, affirmation_id: str) -> Variant:
+    """50/50 variant assignment, independent of which bucket the affirmation landed in"""
+    return Variant.A if _stable_hash(experiment_id, affirmation_id) % 2 == 0 else Variant.B
+
+
+# Precomputed bucket -> experiment lookup, rebuilt from the active experiments when stale
+_bucket_table: list[ExperimentSlice | None] | None = None
+_bucket_table_loaded_at: float = 0.0
+
+
+def invalidate_bucket_table() -> None:
+    """Force the next lookup to rebuild the table - call after activating or completing an experiment"""
+    global _bucket_table
+    _bucket_table = None
+
+
+def get_bucket_table(db: Session) -> list[ExperimentSlice | None]:
+    """Get the bucket -> experiment table, rebuilding it if it was invalidated or has expired"""
+    global _bucket_table, _bucket_table_loaded_at
+
+    if _bucket_table is None or time.monotonic() - _bucket_table_loaded_at >= BUCKET_TABLE_TTL:
+        table: list[ExperimentSlice | None] = [None] * TRAFFIC_BUCKETS
+        active_experiments = db.query(Experiment).filter(
+            Experiment.status == ExperimentStatus.ACTIVE.value
+        ).all()
+
+        for experiment in active_experiments:
+            experiment_slice = ExperimentSlice(
+                experiment_id=experiment.id,
+                variant_a_phrase=experiment.variant_a_phrase,
+                variant_b_phrase=experiment.variant_b_phrase
+            )
+            for bucket in range(experiment.traffic_start, experiment.traffic_end):
+                table[bucket] = experiment_slice
+
+        _bucket_table = table
+        _bucket_table_loaded_at = time.monotonic()
+
+    return _bucket_table
+
+
+def find_experiment_for_affirmation(db: Session, affirmation_id: str) -> ExperimentSlice | None:
+    """Active experiment whose traffic slice this affirmation falls into, if any"""
+    return get_bucket_table(db)[traffic_bucket(affirmation_id)]
+
+
+def find_overlapping_experiment(db: Session, traffic_start: int, traffic_end: int) -> Experiment | None:
+    """First active experiment whose traffic slice overlaps [traffic_start, traffic_end)"""
+    return db.query(Experiment).filter(
+        Experiment.status == ExperimentStatus.ACTIVE.value,
+        Experiment.traffic_start < traffic_end,
+        Experiment.traffic_end > traffic_start
+    ).first()
@@ -0,0 +1,91 @@
+"""In-process cache of resource versions for HTTP conditional requests (ETag / If-None-Match)
+
+ETags are derived from ChampionPhrase.updated_at and each experiment's version counter. The current
+versions are kept in memory, so a request whose If-None-Match still matches can be answered with 304
+without querying the database. The cache is reloaded when this process changes a resource, and after
+VERSION_CACHE_TTL seconds to pick up changes made by other workers.
+"""
+import hashlib
+import time
+from datetime import datetime
+from sqlalchemy.orm import Session
+
+from ..db.models import ChampionPhrase, Experiment, ExperimentStatus
+
+VERSION_CACHE_TTL: float = 5.0
+
+# Cache-Control for resources that can still change - clients may store them but must revalidate
+REVALIDATE_CACHE_CONTROL: str = "no-cache"
+# Completed experiments never change again
+IMMUTABLE_CACHE_CONTROL: str = "public, max-age=31536000, immutable"
+
+_champion_etag: str | None = None
+_experiment_versions: dict[str, tuple[int, str]] | None = None  # id -> (version, status)
+_loaded_at: float = 0.0
+
+
+def champion_etag(updated_at: datetime) -> str:
+    """ETag for a champion phrase version"""
+    return f'"champion-{updated_at.timestamp():.6f}"'
+
+
+def experiment_etag(experiment_id: str, version: int) -> str:
+    """ETag for an experiment version"""
+    return f'"experiment-{experiment_id}-{version}"'
+
+
+def invalidate_versions() -> None:
+    """Force the next lookup to reload versions - call after changing the champion or an experiment"""
+    global _experiment_versions
+    _experiment_versions = None
+
+
+def _load_versions(db: Session) -> dict[str, tuple[int, str]]:
+    """Get the experiment versions, reloading everything if invalidated or expired"""
+    global _champion_etag, _experiment_versions, _loaded_at
+
+    if _experiment_versions is None or time.monotonic() - _loaded_at >= VERSION_CACHE_TTL:
+        champion = db.query(ChampionPhrase.updated_at).filter(ChampionPhrase.id == 1).first()
+        _champion_etag = champion_etag(champion.updated_at) if champion else None
+        _experiment_versions = {
+            row.id: (row.version, row.status)
+            for row in db.query(Experiment.id, Experiment.version, Experiment.status)
+        }
+        _loaded_at = time.monotonic()
+
+    return _experiment_versions
+
+
+def get_champion_etag(db: Session) -> str | None:
+    """ETag of the current champion phrase"""
+    _load_versions(db)
+    return _champion_etag
+
+
+def get_experiment_etag(db: Session, experiment_id: str) -> tuple[str, bool] | None:
+    """ETag of an experiment and whether it is completed (and so immutable), or None if not cached"""
+    version = _load_versions(db).get(experiment_id)
+    if version is None:
+        return None
+
+    experiment_version, experiment_status = version
+    return experiment_etag(experiment_id, experiment_version), experiment_status == ExperimentStatus.COMPLETED.value
+
+
+def get_experiments_list_etag(db: Session, status_filter: str | None) -> str:
+    """ETag of the experiment list - changes whenever any experiment is created or changed"""
+    versions = _load_versions(db)
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update((status_filter or "").encode())
+    for experiment_id, (experiment_version, _) in sorted(versions.items()):
+        digest.update(f"{experiment_id}:{experiment_version};".encode())
+    return f'"experiments-{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header matches the ETag (weak comparison, as RFC 9110 requires for GET)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for the list endpoints: ORM + response_model path vs the column-only orjson path.
+
+Runs the app in-process against a throwaway SQLite database, so no server is needed:
+
+    uv run python -m scripts.bench_list_endpoints
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+from fastapi import APIRouter, Depends, FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.api.routes import router
+from app.db.base import Base
+from app.db.models import AffirmationResult, Experiment, ExperimentStatus
+from app.db.session import get_db
+from app.schemas.models import AffirmationHistoryItem, ExperimentResponse
+from app.services.experiment_service import build_experiment_response
+
+SIZES: tuple[int, ...] = (1_000, 10_000)
+REQUESTS_PER_CASE: int = 20
+
+# The original implementations, kept here so the benchmark has something to compare against
+baseline_router = APIRouter(prefix="/baseline")
+
+
+@baseline_router.get("/affirmations/history", response_model=list[AffirmationHistoryItem])
+async def baseline_affirmation_history(limit: int = 50, db: Session = Depends(get_db)) -> list[AffirmationHistoryItem]:
+    results = db.query(AffirmationResult).order_by(AffirmationResult.created_at.desc()).limit(limit).all()
+    return [
+        AffirmationHistoryItem(
+            affirmation_id=result.affirmation_id,
+            words_of_affirmation=result.words_of_affirmation,
+            joy_sparked=result.joy_sparked,
+            created_at=result.created_at,
+            callback_received_at=result.callback_received_at
+        )
+        for result in results
+    ]
+
+
+@baseline_router.get("/experiments", response_model=list[ExperimentResponse])
+async def baseline_list_experiments(db: Session = Depends(get_db)) -> list[ExperimentResponse]:
+    experiments = db.query(Experiment).order_by(Experiment.created_at.desc()).all()
+    return [build_experiment_response(exp) for exp in experiments]
+
+
+def seed_database(db: Session, count: int) -> None:
+    """Insert `count` affirmations and `count` completed experiments"""
+    start = datetime.now() - timedelta(days=1)
+    db.add_all(
+        AffirmationResult(
+            affirmation_id=str(uuid.uuid4()),
+            words_of_affirmation="You Rock!" if i % 2 else "Whoosa good ferret!",
+            joy_sparked=i % 3 == 0,
+            created_at=start + timedelta(seconds=i),
+            callback_received_at=start + timedelta(seconds=i, milliseconds=500)
+        )
+        for i in range(count)
+    )
+    db.add_all(
+        Experiment(
+            id=str(uuid.uuid4()),
+            name=f"Benchmark experiment {i}",
+            variant_a_phrase="Whoosa good ferret!",
+            variant_b_phrase="You Rock!",
+            status=ExperimentStatus.COMPLETED.value,
+            target_runs=100,
+            created_at=start + timedelta(seconds=i),
+            completed_at=start + timedelta(seconds=i + 60),
+            winning_variant="B",
+            variant_a_wins=40,
+            variant_b_wins=45,
+            variant_a_total=50,
+            variant_b_total=50
+        )
+        for i in range(count)
+    )
+    db.commit()
+
+
+async def requests_per_second(client: httpx.AsyncClient, url: str) -> float:
+    """Issue REQUESTS_PER_CASE sequential requests and return the achieved rate"""
+    # Warm up once so query compilation isn't part of the measurement
+    (await client.get(url)).raise_for_status()
+
+    start = time.perf_counter()
+    for _ in range(REQUESTS_PER_CASE):
+        (await client.get(url)).raise_for_status()
+    return REQUESTS_PER_CASE / (time.perf_counter() - start)
+
+
+async def run_benchmark(db_path: Path) -> None:
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    BenchSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    def get_bench_db():
+        db = BenchSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    # No lifespan - the benchmark database is seeded here instead
+    bench_app = FastAPI()
+    bench_app.include_router(router)
+    bench_app.include_router(baseline_router)
+    bench_app.dependency_overrides[get_db] = get_bench_db
+
+    print(f"{'endpoint':<24} {'items':>7} {'before req/s':>13} {'after req/s':>12} {'speedup':>8}")
+    seeded = 0
+    transport = httpx.ASGITransport(app=bench_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for size in SIZES:
+            with BenchSession() as db:
+                seed_database(db, size - seeded)
+            seeded = size
+
+            for name, path in (
+                ("/affirmations/history", f"/affirmations/history?limit={size}"),
+                ("/experiments", "/experiments"),
+            ):
+                before = await requests_per_second(client, f"/baseline{path}")
+                after = await requests_per_second(client, path)
+                print(f"{name:<24} {size:>7} {before:>13.1f} {after:>12.1f} {after / before:>7.2f}x")
+
+    engine.dispose()
+
+
+def main() -> None:
+    """Run the list endpoint benchmark."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        asyncio.run(run_benchmark(Path(tmp_dir) / "bench.db"))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
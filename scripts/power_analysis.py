@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""CLI tool to estimate the target_runs an experiment needs, offline against the local database."""
+
+import argparse
+import sys
+import time
+
+from app.db.base import Base
+from app.db.migrations import add_missing_columns
+from app.db.models import Experiment, ExperimentStatus
+from app.db.session import SessionLocal, engine
+from app.services.power_service import estimate_target_runs, get_champion_joy_rate, replay_experiment
+
+# Configure stdout to handle Unicode on Windows
+if sys.platform == "win32":
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Estimate target_runs for an experiment, or replay past experiments to check the estimates."
+    )
+    parser.add_argument("--effect-size", type=float, default=0.05, help="Absolute joy rate improvement to detect (default: 0.05)")
+    parser.add_argument("--power", type=float, default=0.8, help="Probability of detecting the improvement (default: 0.8)")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Significance level (default: 0.05)")
+    parser.add_argument("--baseline-rate", type=float, help="Champion joy rate (default: champion's lifetime rate from the database)")
+    parser.add_argument("--replay", action="store_true", help="Replay all completed experiments instead of estimating")
+    return parser.parse_args()
+
+
+def print_estimate(args: argparse.Namespace) -> None:
+    baseline_rate = args.baseline_rate
+    if baseline_rate is None:
+        with SessionLocal() as db:
+            baseline_rate = get_champion_joy_rate(db)
+    if baseline_rate is None:
+        print("❌ Error: The champion phrase has no recorded reactions yet - pass --baseline-rate")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    try:
+        estimate = estimate_target_runs(baseline_rate, args.effect_size, alpha=args.alpha, power=args.power)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    print(f"🦦 Detecting {estimate.baseline_rate:.1%} → {estimate.challenger_rate:.1%} joy (alpha={estimate.alpha}, power={estimate.power})")
+    print(f"📐 Normal approximation: {estimate.analytic_target_runs} runs")
+    print(f"🎲 Monte Carlo:          {estimate.target_runs} runs "
+          f"(simulated power {estimate.simulated_power:.1%} over {estimate.simulations:,} experiments, {elapsed:.2f}s)")
+    print(f"\n👉 Use target_runs={estimate.target_runs}")
+
+
+def print_replays(args: argparse.Namespace) -> None:
+    with SessionLocal() as db:
+        experiments = db.query(Experiment).filter(
+            Experiment.status == ExperimentStatus.COMPLETED.value
+        ).order_by(Experiment.created_at).all()
+
+        if not experiments:
+            print("No completed experiments to replay.")
+            return
+
+        for experiment in experiments:
+            replay = replay_experiment(db, experiment.id, alpha=args.alpha)
+            print(f"\n🧪 {experiment.name} ({replay.total_runs} runs: "
+                  f"A {replay.variant_a_rate:.1%} vs B {replay.variant_b_rate:.1%})")
+            if not replay.checkpoints:
+                print("  Not enough results in both variants to replay")
+            for checkpoint in replay.checkpoints:
+                print(f"  {checkpoint.runs:>6} runs: predicted {checkpoint.predicted_power:6.1%}, "
+                      f"replayed {checkpoint.replayed_power:6.1%}")
+
+
+def main() -> None:
+    """Estimate target_runs or replay past experiments."""
+    args = parse_args()
+
+    # Make sure the tables and columns exist when run against a fresh or older database
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
+
+    if args.replay:
+        print_replays(args)
+    else:
+        print_estimate(args)
+
+
+if __name__ == "__main__":
+    main()
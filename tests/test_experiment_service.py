@@ -0,0 +1,107 @@
+"""Tests for completing experiments and promoting their winners to champion"""
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.db.models import AffirmationResult, ChampionPhrase, TRAFFIC_BUCKETS
+from app.services.event_service import experiment_broadcaster
+from app.services.experiment_service import complete_experiment, create_experiment, update_champion_phrase
+
+CHAMPION = "Whoosa good ferret!"
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(ChampionPhrase(id=1, phrase=CHAMPION))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def start_experiment(db: Session, variant_b_phrase: str, variant_a_joys: int, variant_b_joys: int) -> str:
+    """Create an experiment on half the traffic and record 10 reactions per variant"""
+    experiment = create_experiment(db, variant_b_phrase, variant_b_phrase, 20, 0, TRAFFIC_BUCKETS // 2)
+    for phrase, joys in ((experiment.variant_a_phrase, variant_a_joys), (variant_b_phrase, variant_b_joys)):
+        for i in range(10):
+            db.add(AffirmationResult(
+                affirmation_id=str(uuid.uuid4()),
+                experiment_id=experiment.id,
+                words_of_affirmation=phrase,
+                joy_sparked=i < joys,
+                created_at=datetime.now(),
+                callback_received_at=datetime.now()
+            ))
+    db.commit()
+    return experiment.id
+
+
+def champion_phrase(db: Session) -> str:
+    return db.query(ChampionPhrase.phrase).filter(ChampionPhrase.id == 1).scalar()
+
+
+def test_stale_variant_a_win_does_not_revert_champion(db):
+    winner = start_experiment(db, "X wins", variant_a_joys=2, variant_b_joys=8)
+    loser = start_experiment(db, "Y loses", variant_a_joys=8, variant_b_joys=2)
+
+    complete_experiment(db, winner)
+    assert champion_phrase(db) == "X wins"
+
+    complete_experiment(db, loser)
+    assert champion_phrase(db) == "X wins"
+
+
+def test_only_first_of_two_winning_challengers_replaces_champion(db):
+    first = start_experiment(db, "X wins", variant_a_joys=2, variant_b_joys=8)
+    second = start_experiment(db, "Y also wins", variant_a_joys=2, variant_b_joys=9)
+
+    complete_experiment(db, first)
+    complete_experiment(db, second)
+
+    # Y only beat the old champion, not X, so it must not take the title
+    assert champion_phrase(db) == "X wins"
+
+
+@pytest.fixture
+def announced(monkeypatch):
+    """Champion changes pushed to event stream watchers"""
+    events = []
+    monkeypatch.setattr(experiment_broadcaster, "publish_champion_changed", lambda *args: events.append(args))
+    return events
+
+
+def champion_updated_at(db: Session) -> datetime:
+    return db.query(ChampionPhrase.updated_at).filter(ChampionPhrase.id == 1).scalar()
+
+
+def test_defended_champion_is_not_touched(db, announced):
+    before = champion_updated_at(db)
+
+    complete_experiment(db, start_experiment(db, "Y loses", variant_a_joys=8, variant_b_joys=2))
+
+    assert champion_phrase(db) == CHAMPION
+    assert champion_updated_at(db) == before
+    assert announced == []
+
+
+def test_promoting_the_same_phrase_is_a_no_op(db, announced):
+    before = champion_updated_at(db)
+
+    assert not update_champion_phrase(db, CHAMPION, expected_phrase=CHAMPION)
+
+    assert champion_updated_at(db) == before
+    assert announced == []
+
+
+def test_promotion_is_announced(db, announced):
+    complete_experiment(db, start_experiment(db, "X wins", variant_a_joys=2, variant_b_joys=8))
+
+    assert [phrase for phrase, _ in announced] == ["X wins"]
@@ -0,0 +1,88 @@
+"""Tests for the Spark Joy API client's adaptive concurrency limiter"""
+import asyncio
+import random
+
+import httpx
+import pytest
+
+from app.services.spark_client import AdaptiveConcurrencyLimiter, SparkClient, SparkJoyError
+
+TEST_URL = "http://spark.test/spark"
+
+
+def make_client(handler) -> SparkClient:
+    client = SparkClient(url=TEST_URL)
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_limit_survives_latency_jitter():
+    """An unlimited upstream with jittery latency must not be mistaken for a congested one"""
+    rng = random.Random(42)
+    limiter = AdaptiveConcurrencyLimiter()
+    lowest = limiter.limit
+
+    # One round trip per step: every in-flight call completes with latency U(20ms, 150ms), however many there are
+    for _ in range(1000):
+        for _ in range(int(limiter.limit)):
+            limiter._update_limit(rng.uniform(0.020, 0.150))
+        lowest = min(lowest, limiter.limit)
+
+    assert lowest >= 20
+    assert limiter.limit == limiter.max_limit
+
+
+def test_limit_backs_off_when_upstream_queues():
+    """An upstream that serves 20 calls at a time must hold the limit near its capacity"""
+    rng = random.Random(42)
+    limiter = AdaptiveConcurrencyLimiter()
+    capacity = 20
+
+    # One round trip per step: every in-flight call completes, queued behind the upstream's capacity
+    for _ in range(1000):
+        in_flight = int(limiter.limit)
+        for _ in range(in_flight):
+            limiter._update_limit(rng.uniform(0.020, 0.150) * max(1.0, in_flight / capacity))
+
+    # Unchecked, the limit grows by one per round trip up to max_limit
+    assert capacity <= limiter.limit < 3 * capacity
+
+
+def test_unexpected_httpx_errors_become_spark_joy_errors():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.TooManyRedirects("Exceeded maximum allowed redirects", request=request)
+
+    async def run() -> None:
+        client = make_client(handler)
+        try:
+            await client.spark_joy("You are a very good ferret")
+        finally:
+            await client.aclose()
+
+    with pytest.raises(SparkJoyError):
+        asyncio.run(run())
+
+
+def test_acquire_times_out_when_no_slot_frees_up():
+    async def run() -> None:
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, acquire_timeout=0.05)
+        await limiter.acquire()
+        await limiter.acquire()
+
+    with pytest.raises(SparkJoyError, match="Timed out"):
+        asyncio.run(run())
+
+
+def test_acquire_rejects_callers_beyond_max_waiters():
+    async def run() -> None:
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_waiters=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        try:
+            await limiter.acquire()
+        finally:
+            waiter.cancel()
+
+    with pytest.raises(SparkJoyError, match="queue is full"):
+        asyncio.run(run())